@@ -5,6 +5,10 @@ Optimized Frame Processing with Alert Debouncing
 import sys
 import json
 import time
+import logging
+import threading
+import cv2
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime
 
@@ -19,6 +23,37 @@ from python_modules.motion_detector import MotionDetector
 from python_modules.frame_deduplicator import FrameDeduplicator
 from python_modules.image_optimizer import ImageOptimizer
 
+logger = logging.getLogger(__name__)
+
+# Configuration read on every frame, resolved once at import
+TELEGRAM_ENABLED = Config.TELEGRAM_ENABLED
+CLASSIFICATION_RESULTS_DIR = Config.CLASSIFICATION_RESULTS_DIR
+STATS_LOG_INTERVAL = max(1, Config.STATS_LOG_INTERVAL)
+
+# ===== CLASSIFICATION CACHE =====
+# Classifications are reused for frames whose difference hash is within
+# CLASS_CACHE_MAX_DISTANCE bits of a recently classified frame
+CLASS_CACHE_SIZE = 128
+CLASS_CACHE_MAX_DISTANCE = 4
+
+# ===== FILTER SHORTCUTS =====
+# Above this much motion the scene has changed and cannot be a duplicate
+DEDUP_SKIP_MOTION_PERCENT = 40
+# Duplicates at least this similar carry over the last frame's analysis
+IDENTICAL_SIMILARITY = 0.99
+
+# ===== BACKGROUND ALERTS =====
+# Alerts are sent by the notifier's thread pool so Telegram latency never
+# blocks frame processing. 'alerts_sent' is counted from those threads once a
+# delivery succeeds, so it lags the frames that queued the alerts.
+_alerts_sent_lock = threading.Lock()
+
+def _count_sent_alert(future):
+    """Count an alert once its background send has succeeded"""
+    if future.result():
+        with _alerts_sent_lock:
+            state.stats['alerts_sent'] += 1
+
 # ===== PERSISTENT STATE (keeps across function calls) =====
 class ProcessingState:
     """Singleton to maintain state across function calls"""
@@ -29,8 +64,11 @@ class ProcessingState:
             cls._instance = super().__new__(cls)
             # Initialize once
             cls._instance.motion_detector = MotionDetector(threshold=25, min_change_percent=0.5)
-            cls._instance.frame_deduplicator = FrameDeduplicator(similarity_threshold=0.95)
+            cls._instance.frame_deduplicator = FrameDeduplicator(similarity_threshold=0.94)
             cls._instance.image_optimizer = ImageOptimizer(max_size_kb=150, quality=85)
+            cls._instance.classifier = ImageClassifier()
+            cls._instance.detector = ThreatDetector()
+            cls._instance.notifier = TelegramNotifier()
             cls._instance.stats = {
                 'total_frames': 0,
                 'skipped_no_motion': 0,
@@ -38,8 +76,13 @@ class ProcessingState:
                 'processed': 0,
                 'threats_detected': 0,
                 'alerts_sent': 0,
-                'alerts_debounced': 0
+                'alerts_debounced': 0,
+                'classification_cache_hits': 0
             }
+            cls._instance.class_cache = OrderedDict()
+            cls._instance.last_classification = None
+            cls._instance.last_threat_analysis = None
+            cls._instance.last_hash = None
         return cls._instance
     
     @classmethod
@@ -48,6 +91,10 @@ class ProcessingState:
         if cls._instance:
             cls._instance.motion_detector.reset()
             cls._instance.frame_deduplicator.reset()
+            cls._instance.class_cache.clear()
+            cls._instance.last_classification = None
+            cls._instance.last_threat_analysis = None
+            cls._instance.last_hash = None
             cls._instance.stats = {
                 'total_frames': 0,
                 'skipped_no_motion': 0,
@@ -55,198 +102,355 @@ class ProcessingState:
                 'processed': 0,
                 'threats_detected': 0,
                 'alerts_sent': 0,
-                'alerts_debounced': 0
+                'alerts_debounced': 0,
+                'classification_cache_hits': 0
             }
 
 # Get singleton instance
 state = ProcessingState()
 
-def process_frame(image_path):
-    """
-    Process a single frame with smart filtering and alert debouncing
-    
-    Args:
-        image_path: Path to the captured frame
-        
-    Returns:
-        dict: Processing results
-    """
+def _start_frame(image_path):
+    """Print the frame header and create an empty result for it"""
     state.stats['total_frames'] += 1
-    
-    start_time = time.time()
     frame_name = Path(image_path).name
     
-    print(f"\n{'='*60}")
-    print(f"🎬 Frame {state.stats['total_frames']}: {frame_name}")
-    print(f"⏱️  Start: {datetime.now().strftime('%H:%M:%S.%f')[:-3]}")
-    print(f"{'='*60}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s", '='*60)
+        logger.debug("🎬 Frame %s: %s", state.stats['total_frames'], frame_name)
+        logger.debug("⏱️  Start: %s", datetime.now().strftime('%H:%M:%S.%f')[:-3])
+        logger.debug("%s", '='*60)
     
-    result = {
+    return {
         'success': False,
         'image_file': frame_name,
         'skipped': False,
         'skip_reason': None,
         'classification': None,
+        'classification_cached': False,
         'threat_analysis': None,
         'alert_sent': False,
+        'alert_queued': False,
         'alert_debounced': False,
         'processing_time': 0,
         'error': None
     }
+
+def _filter_frame(frame, result):
+    """
+    Run motion detection and deduplication on a decoded frame
     
-    try:
-        # ===== STEP 1: Motion Detection =====
-        has_motion, motion_percent = state.motion_detector.detect_motion(image_path)
-        
-        if not has_motion:
-            state.stats['skipped_no_motion'] += 1
-            print(f"⏭️  SKIPPED: No motion detected ({motion_percent:.2f}% change)")
-            print(f"📊 Stats: {state.stats['processed']} processed, {state.stats['skipped_no_motion']} skipped (no motion)")
-            result['success'] = True
-            result['skipped'] = True
-            result['skip_reason'] = 'no_motion'
-            result['motion_percent'] = motion_percent
-            return result
-        
-        print(f"🎯 Motion detected: {motion_percent:.2f}% change")
-        
-        # ===== STEP 2: Deduplication =====
-        is_duplicate, similarity = state.frame_deduplicator.is_duplicate(image_path)
-        
-        if is_duplicate:
-            state.stats['skipped_duplicate'] += 1
-            print(f"⏭️  SKIPPED: Duplicate frame ({similarity*100:.1f}% similar)")
-            print(f"📊 Stats: {state.stats['processed']} processed, {state.stats['skipped_duplicate']} skipped (duplicate)")
-            result['success'] = True
-            result['skipped'] = True
-            result['skip_reason'] = 'duplicate'
-            result['similarity'] = similarity
-            return result
-        
-        print(f"✓ Frame is unique ({similarity*100:.1f}% similar to previous)")
-        
-        # ===== STEP 3: Image Optimization =====
-        optimized_path = state.image_optimizer.optimize(image_path)
-        
-        # ===== STEP 4: AI Classification =====
-        print("\n🤖 Starting AI classification...")
-        classify_start = time.time()
-        
-        classifier = ImageClassifier()
-        classification = classifier.classify_image(optimized_path)
-        
-        classify_time = time.time() - classify_start
-        print(f"⏱️  Classification took: {classify_time:.2f}s")
-        
-        result['classification'] = classification
-        
-        # Save classification result
-        result_file = classifier.save_result(
-            image_path,
-            classification,
-            Config.CLASSIFICATION_RESULTS_DIR
-        )
-        result['result_file'] = result_file
-        
-        # ===== STEP 5: Threat Analysis =====
-        print("\n🔍 Analyzing threats...")
-        threat_start = time.time()
-        
-        detector = ThreatDetector()
-        threat_analysis = detector.analyze_threat(classification, frame_name)
-        
-        threat_time = time.time() - threat_start
-        print(f"⏱️  Threat analysis took: {threat_time:.2f}s")
-        
-        result['threat_analysis'] = threat_analysis
-        state.stats['processed'] += 1
-        
-        # ===== STEP 6: Send Alert (with debouncing) =====
-        if threat_analysis['threat_detected']:
-            state.stats['threats_detected'] += 1
-            print(f"\n🚨 THREAT DETECTED: {threat_analysis['threat_level']}")
-            
-            if Config.TELEGRAM_ENABLED:
-                print("📱 Checking alert cooldown...")
-                alert_start = time.time()
-                
-                notifier = TelegramNotifier()
-                alert_sent = notifier.send_alert(threat_analysis, image_path)
-                
-                if alert_sent:
-                    alert_time = time.time() - alert_start
-                    print(f"⏱️  Alert took: {alert_time:.2f}s")
-                    state.stats['alerts_sent'] += 1
-                    result['alert_sent'] = True
-                else:
-                    # Check if it was debounced
-                    if notifier._should_debounce(threat_analysis['threat_level']):
-                        state.stats['alerts_debounced'] += 1
-                        result['alert_debounced'] = True
-            else:
-                print("📱 Telegram notifications disabled")
-        else:
-            print(f"\n✅ No threats: {threat_analysis['threat_level']}")
-        
+    Returns:
+        bool: True if the frame still needs classification
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    
+    # ===== STEP 1: Motion Detection =====
+    has_motion, motion_percent = state.motion_detector.detect_motion_gray(gray)
+    
+    if not has_motion:
+        state.stats['skipped_no_motion'] += 1
+        logger.debug("⏭️  SKIPPED: No motion detected (%.2f%% change)", motion_percent)
         result['success'] = True
+        result['skipped'] = True
+        result['skip_reason'] = 'no_motion'
+        result['motion_percent'] = motion_percent
+        return False
+    
+    logger.debug("🎯 Motion detected: %.2f%% change", motion_percent)
+    
+    # ===== STEP 2: Deduplication =====
+    # (a first frame reports full motion without any comparison, so it is not a scene change)
+    if motion_percent > DEDUP_SKIP_MOTION_PERCENT and state.motion_detector.had_reference:
+        # New scene: cannot be a duplicate, only keep its hash for the next frame
+        state.frame_deduplicator.remember_gray(gray)
+        logger.debug("✓ Deduplication skipped (scene change)")
+        return True
+    
+    compared_hash = state.frame_deduplicator.prev_hash
+    is_duplicate, similarity = state.frame_deduplicator.is_duplicate_gray(gray)
+    
+    if is_duplicate:
+        state.stats['skipped_duplicate'] += 1
+        logger.debug("⏭️  SKIPPED: Duplicate frame (%.1f%% similar)", similarity*100)
+        result['success'] = True
+        result['skipped'] = True
+        result['skip_reason'] = 'duplicate'
+        result['similarity'] = similarity
         
-        # Clean up optimized image if different
-        if optimized_path != image_path:
-            try:
-                Path(optimized_path).unlink()
-            except:
-                pass
+        # A near-identical frame has the same analysis as the frame it was
+        # compared with, if that frame is the one last analyzed
+        if (similarity >= IDENTICAL_SIMILARITY and compared_hash is not None
+                and compared_hash == state.last_hash):
+            result['classification'] = state.last_classification
+            result['threat_analysis'] = state.last_threat_analysis
+            result['classification_cached'] = True
+        return False
+    
+    logger.debug("✓ Frame is unique (%.1f%% similar to previous)", similarity*100)
+    return True
+
+def _classify_frame(image_path, frame, frame_hash, result):
+    """Optimize and classify a frame, then analyze it"""
+    # ===== STEP 3: Image Optimization =====
+    image_bytes = state.image_optimizer.optimize_bytes(image_path, frame)
+    
+    # ===== STEP 4: AI Classification =====
+    logger.info("🤖 Starting AI classification...")
+    classify_start = time.perf_counter()
+    
+    classification = state.classifier.classify_bytes(image_bytes)
+    
+    classify_time = time.perf_counter() - classify_start
+    logger.info("⏱️  Classification took: %.2fs", classify_time)
+    
+    _cache_classification(frame_hash, classification)
+    _analyze_frame(image_path, frame_hash, classification, result)
+
+def _find_cached_classification(frame_hash):
+    """Return the cached classification of a perceptually similar frame, if any"""
+    if frame_hash is None:
+        return None
+    
+    for cached_hash, classification in state.class_cache.items():
+        if bin(cached_hash ^ frame_hash).count('1') <= CLASS_CACHE_MAX_DISTANCE:
+            state.class_cache.move_to_end(cached_hash)
+            return classification
+    
+    return None
+
+def _cache_classification(frame_hash, classification):
+    """Remember a classification by frame hash, evicting the least recently used"""
+    if frame_hash is None:
+        return
+    
+    state.class_cache[frame_hash] = classification
+    state.class_cache.move_to_end(frame_hash)
+    if len(state.class_cache) > CLASS_CACHE_SIZE:
+        state.class_cache.popitem(last=False)
+
+def _analyze_frame(image_path, frame_hash, classification, result):
+    """Save the classification, analyze it for threats and send alerts"""
+    frame_name = result['image_file']
+    result['classification'] = classification
+    
+    # Save classification result
+    result_file = state.classifier.save_result(
+        image_path,
+        classification,
+        CLASSIFICATION_RESULTS_DIR
+    )
+    result['result_file'] = result_file
+    
+    # ===== STEP 5: Threat Analysis =====
+    logger.debug("🔍 Analyzing threats...")
+    threat_start = time.perf_counter()
+    
+    threat_analysis = state.detector.analyze_threat(classification, frame_name)
+    
+    threat_time = time.perf_counter() - threat_start
+    logger.debug("⏱️  Threat analysis took: %.2fs", threat_time)
+    
+    result['threat_analysis'] = threat_analysis
+    state.stats['processed'] += 1
+    state.last_classification = classification
+    state.last_threat_analysis = threat_analysis
+    state.last_hash = frame_hash
+    
+    # ===== STEP 6: Send Alert (with debouncing) =====
+    if threat_analysis['threat_detected']:
+        level = threat_analysis['threat_level']
+        state.stats['threats_detected'] += 1
+        logger.warning("🚨 THREAT DETECTED: %s (%s)", level, frame_name)
         
-    except Exception as e:
-        error_msg = str(e)
-        print(f"\n❌ Processing failed: {error_msg}")
-        result['error'] = error_msg
+        if not TELEGRAM_ENABLED:
+            logger.info("📱 Telegram notifications disabled")
+        else:
+            future = state.notifier.send_alert(threat_analysis, image_path)
+            if future is None:
+                state.stats['alerts_debounced'] += 1
+                result['alert_debounced'] = True
+            else:
+                future.add_done_callback(_count_sent_alert)
+                logger.info("📱 Alert queued for delivery")
+                result['alert_queued'] = True
+    else:
+        logger.info("✅ No threats: %s (%s)", threat_analysis['threat_level'], frame_name)
+    
+    # The alert text is built on dispatch, so the (score, keyword) reasons can
+    # now become the strings the JSON result carries
+    if threat_analysis['threat_reasons']:
+        threat_analysis['threat_reasons'] = threat_analysis.formatted_reasons()
     
+    result['success'] = True
+
+def _record_error(result, error):
+    """Mark a frame result as failed"""
+    error_msg = str(error)
+    logger.error("❌ Processing failed (%s): %s", result['image_file'], error_msg)
+    result['error'] = error_msg
+
+def _finish_frame(result, start_time):
+    """Record the processing time of a frame and print the session summary"""
     # ===== SUMMARY =====
-    total_time = time.time() - start_time
+    total_time = time.perf_counter() - start_time
     result['processing_time'] = total_time
     
-    print(f"\n{'='*60}")
-    print(f"⏱️  Total time: {total_time:.2f}s")
-    print(f"📊 Session stats:")
-    print(f"   Total frames: {state.stats['total_frames']}")
-    print(f"   Processed: {state.stats['processed']}")
-    print(f"   Skipped (no motion): {state.stats['skipped_no_motion']}")
-    print(f"   Skipped (duplicate): {state.stats['skipped_duplicate']}")
-    print(f"   Threats detected: {state.stats['threats_detected']}")
-    print(f"   Alerts sent: {state.stats['alerts_sent']}")
-    print(f"   Alerts debounced: {state.stats['alerts_debounced']}")
+    logger.debug("⏱️  Total time (%s): %.2fs", result['image_file'], total_time)
+    
+    # Session stats every STATS_LOG_INTERVAL frames, or every frame when debugging
+    if state.stats['total_frames'] % STATS_LOG_INTERVAL == 0:
+        level = logging.INFO
+    else:
+        level = logging.DEBUG
+    
+    if not logger.isEnabledFor(level):
+        return
+    
+    logger.log(level, "%s", '='*60)
+    logger.log(level, "📊 Session stats:")
+    logger.log(level, "   Total frames: %s", state.stats['total_frames'])
+    logger.log(level, "   Processed: %s", state.stats['processed'])
+    logger.log(level, "   Skipped (no motion): %s", state.stats['skipped_no_motion'])
+    logger.log(level, "   Skipped (duplicate): %s", state.stats['skipped_duplicate'])
+    logger.log(level, "   Threats detected: %s", state.stats['threats_detected'])
+    logger.log(level, "   Alerts delivered so far: %s", state.stats['alerts_sent'])
+    logger.log(level, "   Alerts debounced: %s", state.stats['alerts_debounced'])
+    logger.log(level, "   Classification cache hits: %s", state.stats['classification_cache_hits'])
     
     # Calculate cost savings
     total_skipped = state.stats['skipped_no_motion'] + state.stats['skipped_duplicate']
     if state.stats['total_frames'] > 0:
         savings_percent = (total_skipped / state.stats['total_frames']) * 100
-        api_calls_saved = total_skipped + state.stats['alerts_debounced']
-        print(f"   💰 Cost savings: {savings_percent:.1f}% ({api_calls_saved} API calls avoided)")
+        api_calls_saved = total_skipped + state.stats['alerts_debounced'] + state.stats['classification_cache_hits']
+        logger.log(level, "   💰 Cost savings: %.1f%% (%s API calls avoided)", savings_percent, api_calls_saved)
     
-    print(f"{'='*60}\n")
+    logger.log(level, "%s", '='*60)
+
+def process_frame(image_path):
+    """
+    Process a single frame with smart filtering and alert debouncing
     
+    Args:
+        image_path: Path to the captured frame
+        
+    Returns:
+        dict: Processing results
+    """
+    start_time = time.perf_counter()
+    result = _start_frame(image_path)
+    
+    try:
+        # Decode once for motion detection, deduplication and optimization
+        frame = cv2.imread(str(image_path))
+        if frame is None:
+            raise ValueError(f"Could not decode image: {image_path}")
+        
+        if _filter_frame(frame, result):
+            # Reuse the classification of a similar frame instead of calling the API
+            frame_hash = state.frame_deduplicator.prev_hash
+            classification = _find_cached_classification(frame_hash)
+            
+            if classification is not None:
+                state.stats['classification_cache_hits'] += 1
+                logger.info("♻️  Reusing classification of a similar frame")
+                result['classification_cached'] = True
+                _analyze_frame(image_path, frame_hash, classification, result)
+            else:
+                _classify_frame(image_path, frame, frame_hash, result)
+    except Exception as e:
+        _record_error(result, e)
+    
+    _finish_frame(result, start_time)
     return result
 
+def _write_result(result, prefix=''):
+    """
+    Write one PYTHON_RESULT line to stdout
+    
+    The line goes out in a single write while the log handlers' locks are
+    held, so log records from the alert threads cannot split it.
+    """
+    line = prefix + "PYTHON_RESULT:" + json.dumps(result) + "\n"
+    handlers = logging.getLogger().handlers
+    for handler in handlers:
+        handler.acquire()
+    try:
+        sys.stdout.write(line)
+        sys.stdout.flush()
+    finally:
+        for handler in reversed(handlers):
+            handler.release()
+
+def run_daemon():
+    """
+    Process image paths read line by line from stdin until EOF
+    
+    Writes one PYTHON_RESULT line per path to stdout, keeping the interpreter,
+    imports and ProcessingState warm across frames.
+    """
+    logger.info("🐍 Frame processor ready (daemon mode)")
+    
+    for line in sys.stdin:
+        image_path = line.strip()
+        if not image_path:
+            continue
+        
+        if not Path(image_path).exists():
+            logger.error("❌ Image not found: %s", image_path)
+            result = {
+                'success': False,
+                'image_file': Path(image_path).name,
+                'error': 'Image not found'
+            }
+        else:
+            try:
+                result = process_frame(image_path)
+            except Exception as e:
+                logger.exception("❌ Processing failed: %s", e)
+                result = {
+                    'success': False,
+                    'image_file': Path(image_path).name,
+                    'error': str(e)
+                }
+        
+        _write_result(result)
+    
+    # Deliver queued alerts before exiting
+    TelegramNotifier.shutdown()
+
 def main():
     """Main function for command-line usage"""
+    logging.basicConfig(stream=sys.stdout, level=Config.LOG_LEVEL, format='%(message)s')
+    # Keep urllib3 retry and connection pool warnings, without its debug chatter
+    logging.getLogger('urllib3').setLevel(logging.WARNING)
+    
     if len(sys.argv) < 2:
-        print("Usage: python process_frame.py <image_path>")
+        print("Usage: python process_frame.py <image_path> [<image_path> ...]")
+        print("       python process_frame.py --daemon  (reads image paths from stdin)")
         sys.exit(1)
     
-    image_path = sys.argv[1]
+    if sys.argv[1] == '--daemon':
+        run_daemon()
+        sys.exit(0)
     
-    if not Path(image_path).exists():
-        print(f"❌ Image not found: {image_path}")
-        sys.exit(1)
+    image_paths = sys.argv[1:]
+    
+    for image_path in image_paths:
+        if not Path(image_path).exists():
+            logger.error("❌ Image not found: %s", image_path)
+            sys.exit(1)
+    
+    # Process the frames in capture order
+    results = [process_frame(image_path) for image_path in image_paths]
     
-    # Process the frame
-    result = process_frame(image_path)
+    # Output one result line per frame as JSON for Node.js to parse
+    for result in results:
+        _write_result(result, prefix="\n")
     
-    # Output result as JSON for Node.js to parse
-    print("\nPYTHON_RESULT:" + json.dumps(result))
+    # Deliver queued alerts before exiting
+    TelegramNotifier.shutdown()
     
-    sys.exit(0 if result['success'] else 1)
+    sys.exit(0 if all(result['success'] for result in results) else 1)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,63 @@
+"""
+Difference hash kernel for FrameDeduplicator
+Compiled with Numba when it is installed, NumPy otherwise
+"""
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _dhash_similarity_kernel(thumb, prev_hash):
+        """
+        Hash a grayscale thumbnail and compare it with prev_hash in one pass
+        
+        Args:
+            thumb: uint8 thumbnail, one column wider than high
+            prev_hash: Previous hash as np.uint64
+        
+        Returns:
+            tuple: (hash: np.uint64, similarity: float)
+        """
+        rows, cols = thumb.shape
+        one = np.uint64(1)
+        zero = np.uint64(0)
+        
+        # One bit per horizontally adjacent pixel pair, most significant bit first
+        h = zero
+        for y in range(rows):
+            for x in range(cols - 1):
+                h = (h << one) | (one if thumb[y, x + 1] > thumb[y, x] else zero)
+        
+        # Hamming distance to the previous hash
+        diff = h ^ prev_hash
+        hamming = 0
+        while diff:
+            diff &= diff - one
+            hamming += 1
+        
+        return h, 1.0 - hamming / (rows * (cols - 1))
+    
+    def dhash_similarity(thumb, prev_hash):
+        """
+        Hash a grayscale thumbnail and compare it with prev_hash
+        
+        Returns:
+            tuple: (hash: int, similarity: float)
+        """
+        h, similarity = _dhash_similarity_kernel(np.ascontiguousarray(thumb), np.uint64(prev_hash))
+        return int(h), similarity
+else:
+    def dhash_similarity(thumb, prev_hash):
+        """
+        Hash a grayscale thumbnail and compare it with prev_hash
+        
+        Returns:
+            tuple: (hash: int, similarity: float)
+        """
+        bits = thumb[:, 1:] > thumb[:, :-1]
+        h = int(np.packbits(bits.ravel()).view('>u8')[0])
+        return h, 1 - bin(h ^ prev_hash).count('1') / bits.size
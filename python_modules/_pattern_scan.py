@@ -0,0 +1,123 @@
+"""
+Multi-pattern scanner for ThreatDetector
+Looks up whole-word keyword groups in a dict, and scans the remaining
+patterns with a Hyperscan database when it is installed, a combined regex otherwise
+
+Patterns and scanned text are lowercase and matched as bytes, so the regex
+engine needs neither case folding nor Unicode tables.
+"""
+import re
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+# Words of the scanned text
+WORD_RE = re.compile(rb'\w+')
+# Patterns of the form \b(word|word|...)\b, answerable by keyword lookup
+LITERAL_PATTERN_RE = re.compile(r'\\b\((\w+(?:\|\w+)*)\)\\b')
+
+class PatternScanner:
+    def __init__(self, patterns):
+        """
+        Compile a list of lowercase ASCII regex patterns for scanning together
+        
+        Args:
+            patterns: Regex pattern strings; a pattern's id is its index
+        """
+        # keyword -> ids of the literal keyword patterns containing it
+        self.keywords = {}
+        # id -> compiled pattern, for patterns needing the regex engine
+        self.patterns = {}
+        
+        for pattern_id, pattern in enumerate(patterns):
+            literal = LITERAL_PATTERN_RE.fullmatch(pattern)
+            if literal:
+                for keyword in literal.group(1).split('|'):
+                    self.keywords.setdefault(keyword.encode('ascii'), []).append(pattern_id)
+            else:
+                self.patterns[pattern_id] = re.compile(pattern.encode('ascii'))
+        
+        if not self.patterns:
+            return
+        
+        residual = [patterns[pattern_id].encode('ascii') for pattern_id in self.patterns]
+        if hyperscan is not None:
+            # One database, each pattern reported at most once per scan
+            self._database = hyperscan.Database()
+            self._database.compile(
+                expressions=residual,
+                ids=list(self.patterns),
+                elements=len(residual),
+                flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(residual)
+            )
+        else:
+            self._union = re.compile(b'|'.join(b'(?:' + p + b')' for p in residual))
+    
+    def scan(self, text):
+        """
+        Scan lowercase text once for all patterns
+        
+        Returns:
+            ScanResult: First match of each pattern, looked up by pattern id
+        """
+        data = text.encode('utf-8')
+        keyword_hits = {}
+        
+        # A whole-word keyword group matches exactly when one of the words does
+        if self.keywords:
+            for word in WORD_RE.findall(data):
+                for pattern_id in self.keywords.get(word, ()):
+                    keyword_hits.setdefault(pattern_id, word)
+        
+        candidates = self._regex_candidates(data) if self.patterns else ()
+        return ScanResult(self, data, keyword_hits, candidates)
+    
+    def _regex_candidates(self, data):
+        """Ids of the regex patterns that may match data"""
+        if hyperscan is not None:
+            # Single pass over the text for all regex patterns at once
+            matched_ids = set()
+            
+            def on_match(pattern_id, start, end, flags, context):
+                matched_ids.add(pattern_id)
+            
+            self._database.scan(data, match_event_handler=on_match)
+            return matched_ids
+        
+        # Text without any hit costs a single scan of the union
+        if not self._union.search(data):
+            return ()
+        return self.patterns
+
+class ScanResult:
+    def __init__(self, scanner, data, keyword_hits, candidates):
+        """
+        Matches of one scanned text
+        
+        Args:
+            scanner: PatternScanner that scanned the text
+            data: The scanned text, UTF-8 encoded
+            keyword_hits: pattern id -> first matched keyword, for keyword patterns
+            candidates: Ids of the regex patterns that may match
+        """
+        self.scanner = scanner
+        self.data = data
+        self.keyword_hits = keyword_hits
+        self.candidates = candidates
+    
+    def match(self, pattern_id):
+        """
+        Text of the first match of a pattern, or None
+        
+        Regex patterns are only searched when asked for, so callers that stop
+        early skip the remaining searches.
+        """
+        if pattern_id in self.keyword_hits:
+            return self.keyword_hits[pattern_id].decode('ascii')
+        if pattern_id in self.candidates:
+            match = self.scanner.patterns[pattern_id].search(self.data)
+            if match:
+                return match.group(0).decode('utf-8', errors='replace')
+        return None
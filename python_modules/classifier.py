@@ -1,11 +1,34 @@
 import base64
+import os
 import requests
 import json
 import zipfile
 import io
+import logging
+from functools import lru_cache
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from .config import Config
 
+logger = logging.getLogger(__name__)
+
+# Read once at import instead of on every frame
+DEFAULT_TASK = Config.CLASSIFICATION_TASK
+
+CONTENT_TYPES = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.bmp': 'image/bmp'
+}
+
+@lru_cache(maxsize=16)
+def _get_content_type(ext):
+    """Determine image content type from a lowercase file extension"""
+    return CONTENT_TYPES.get(ext, 'image/jpeg')
+
 class ImageClassifier:
     def __init__(self):
         self.api_key = Config.NVIDIA_API_KEY
@@ -15,6 +38,15 @@ class ImageClassifier:
             "Content-Type": "application/json",
             "Accept": "application/json"
         }
+        
+        # Keep-alive session so consecutive requests reuse the TLS connection
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=1,
+            max_retries=Retry(total=3, backoff_factor=0.3)
+        )
+        self.session.mount('https://', adapter)
     
     def classify_image(self, image_path, task=None):
         """
@@ -27,97 +59,101 @@ class ImageClassifier:
         Returns:
             str: Classification result
         """
-        task = task or Config.CLASSIFICATION_TASK
-        
-        print(f"🤖 Classifying: {Path(image_path).name}")
-        print(f"🔍 Task: {task}")
+        logger.debug("🤖 Classifying: %s", Path(image_path).name)
         
         try:
-            # Read and encode image
+            # Read image
             with open(image_path, 'rb') as f:
                 image_data = f.read()
+        except FileNotFoundError:
+            raise Exception(f"Image file not found: {image_path}")
+        
+        return self.classify_bytes(image_data, _get_content_type(Path(image_path).suffix.lower()), task)
+    
+    def classify_bytes(self, image_bytes, content_type='image/jpeg', task=None):
+        """
+        Classify an encoded image held in memory using NVIDIA Florence-2
+        
+        Args:
+            image_bytes: Encoded image data
+            content_type: MIME type of the image data
+            task: Classification task (default: from config)
             
+        Returns:
+            str: Classification result
+        """
+        task = task or DEFAULT_TASK
+        
+        logger.debug("🔍 Task: %s", task)
+        
+        try:
             # Check file size
-            file_size_kb = len(image_data) / 1024
-            print(f"📦 Image size: {file_size_kb:.1f}KB")
+            file_size_kb = len(image_bytes) / 1024
+            logger.debug("📦 Image size: %.1fKB", file_size_kb)
             
             if file_size_kb > 5000:  # 5MB limit
                 raise ValueError(f"Image too large: {file_size_kb:.1f}KB (max: 5MB)")
             
-            # Encode to base64
-            base64_image = base64.b64encode(image_data).decode('utf-8')
-            
-            # Determine content type
-            content_type = self._get_content_type(image_path)
-            
             # Create request payload
-            content = f'{task}<img src="data:{content_type};base64,{base64_image}" />'
-            payload = {
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": content
-                    }
-                ]
-            }
+            body = self._build_payload(image_bytes, content_type, task)
             
             # Make API request
-            print("📡 Sending request to NVIDIA API...")
+            logger.debug("📡 Sending request to NVIDIA API...")
             
-            response = requests.post(
+            # Stream the body so a ZIP reply is read once, straight off the socket
+            with self.session.post(
                 self.api_url,
                 headers=self.headers,
-                json=payload,
-                timeout=300
-            )
-            
-            print(f"📥 Response Status: {response.status_code}")
-            
-            # Check response
-            if response.status_code == 200:
-                response_content_type = response.headers.get('content-type', '').lower()
-                print(f"📄 Response Content-Type: {response_content_type}")
-                
-                # Handle JSON response
-                if 'application/json' in response_content_type:
-                    result = response.json()
-                    classification = result['choices'][0]['message']['content']
+                data=body,
+                timeout=300,
+                stream=True
+            ) as response:
+                logger.debug("📥 Response Status: %s", response.status_code)
                 
-                # Handle ZIP response (common for Florence-2)
-                elif 'application/zip' in response_content_type or 'application/octet-stream' in response_content_type:
-                    print("📦 Extracting ZIP response...")
-                    classification = self._extract_from_zip(response.content, task)
-                
-                else:
-                    raise Exception(f"Unexpected content type: {response_content_type}")
-                
-                # Remove task prefix if present
-                if classification.startswith(task):
-                    classification = classification[len(task):].strip()
-                
-                print(f"✅ Classification successful")
-                print(f"📝 Result: {classification[:100]}...")
-                return classification
-            else:
-                error_msg = response.text
-                print(f"❌ API Error {response.status_code}")
-                
-                # Provide helpful error messages
-                if response.status_code == 401:
-                    raise Exception("Authentication failed - check your NVIDIA API key")
-                elif response.status_code == 403:
-                    raise Exception("Access forbidden - API key may not have permission")
-                elif response.status_code == 413:
-                    raise Exception("Image too large - reduce quality in config")
-                elif response.status_code == 429:
-                    raise Exception("Rate limit exceeded - slow down requests")
-                elif response.status_code == 500:
-                    raise Exception("NVIDIA API server error - try again later")
+                # Check response
+                if response.status_code == 200:
+                    response_content_type = response.headers.get('content-type', '').lower()
+                    logger.debug("📄 Response Content-Type: %s", response_content_type)
+                    
+                    # Handle JSON response
+                    if 'application/json' in response_content_type:
+                        result = response.json()
+                        classification = result['choices'][0]['message']['content']
+                    
+                    # Handle ZIP response (common for Florence-2)
+                    elif 'application/zip' in response_content_type or 'application/octet-stream' in response_content_type:
+                        logger.debug("📦 Extracting ZIP response...")
+                        zip_stream = io.BytesIO(response.raw.read(decode_content=True))
+                        classification = self._extract_from_zip(zip_stream, task)
+                    
+                    else:
+                        raise Exception(f"Unexpected content type: {response_content_type}")
+                    
+                    # Remove task prefix if present
+                    if classification.startswith(task):
+                        classification = classification[len(task):].strip()
+                    
+                    logger.debug("✅ Classification successful")
+                    logger.info("📝 Result: %s...", classification[:100])
+                    return classification
                 else:
-                    raise Exception(f"API Error {response.status_code}: {error_msg[:200]}")
+                    error_msg = response.text
+                    logger.error("❌ API Error %s", response.status_code)
                     
-        except FileNotFoundError:
-            raise Exception(f"Image file not found: {image_path}")
+                    # Provide helpful error messages
+                    if response.status_code == 401:
+                        raise Exception("Authentication failed - check your NVIDIA API key")
+                    elif response.status_code == 403:
+                        raise Exception("Access forbidden - API key may not have permission")
+                    elif response.status_code == 413:
+                        raise Exception("Image too large - reduce quality in config")
+                    elif response.status_code == 429:
+                        raise Exception("Rate limit exceeded - slow down requests")
+                    elif response.status_code == 500:
+                        raise Exception("NVIDIA API server error - try again later")
+                    else:
+                        raise Exception(f"API Error {response.status_code}: {error_msg[:200]}")
+                        
         except requests.exceptions.Timeout:
             raise Exception("API request timed out - try again")
         except requests.exceptions.ConnectionError:
@@ -127,23 +163,46 @@ class ImageClassifier:
                 raise
             raise Exception(f"Classification failed: {str(e)}")
     
-    def _extract_from_zip(self, zip_content, task):
+    def _build_payload(self, image_bytes, content_type, task):
+        """
+        Build the JSON request body as bytes
+        
+        Florence-2 only accepts the image inline as a base64 data URL, so the
+        base64 bytes are spliced straight into the body instead of being
+        decoded to str and escaped again by json.dumps.
+        
+        Returns:
+            bytes: Serialized {"messages": [{"role": "user", "content": ...}]}
+        """
+        # Quoted JSON strings with the quote next to the image data cut off
+        content_head = json.dumps(f'{task}<img src="data:{content_type};base64,')[:-1]
+        content_tail = json.dumps('" />')[1:]
+        
+        return b''.join((
+            b'{"messages": [{"role": "user", "content": ',
+            content_head.encode('utf-8'),
+            base64.b64encode(image_bytes),
+            content_tail.encode('utf-8'),
+            b'}]}'
+        ))
+    
+    def _extract_from_zip(self, zip_stream, task):
         """
         Extract classification result from ZIP response
         
         Args:
-            zip_content: ZIP file content as bytes
+            zip_stream: Seekable file object holding the ZIP response
             task: The task prefix to look for
             
         Returns:
             str: Extracted classification text
         """
         try:
-            # Read ZIP file from bytes
-            with zipfile.ZipFile(io.BytesIO(zip_content)) as zip_file:
+            # Read ZIP file from the response stream
+            with zipfile.ZipFile(zip_stream) as zip_file:
                 # List files in ZIP
                 file_list = zip_file.namelist()
-                print(f"📋 Files in ZIP: {file_list}")
+                logger.debug("📋 Files in ZIP: %s", file_list)
                 
                 # Look for .response file (contains JSON)
                 response_file = None
@@ -156,15 +215,14 @@ class ImageClassifier:
                     raise Exception("No .response file found in ZIP")
                 
                 # Extract and parse JSON
-                print(f"📄 Reading: {response_file}")
+                logger.debug("📄 Reading: %s", response_file)
                 with zip_file.open(response_file) as f:
-                    json_content = f.read().decode('utf-8')
-                    result = json.loads(json_content)
+                    result = json.load(f)
                     
                     # Extract classification from JSON
                     if 'choices' in result and len(result['choices']) > 0:
                         classification = result['choices'][0]['message']['content']
-                        print(f"✅ Extracted from ZIP successfully")
+                        logger.debug("✅ Extracted from ZIP successfully")
                         return classification
                     else:
                         raise Exception("Invalid JSON structure in ZIP")
@@ -176,18 +234,6 @@ class ImageClassifier:
         except Exception as e:
             raise Exception(f"Failed to extract from ZIP: {e}")
     
-    def _get_content_type(self, image_path):
-        """Determine image content type from file extension"""
-        ext = Path(image_path).suffix.lower()
-        content_types = {
-            '.jpg': 'image/jpeg',
-            '.jpeg': 'image/jpeg',
-            '.png': 'image/png',
-            '.gif': 'image/gif',
-            '.bmp': 'image/bmp'
-        }
-        return content_types.get(ext, 'image/jpeg')
-    
     def save_result(self, image_path, classification, output_dir):
         """Save classification result to JSON file"""
         from datetime import datetime
@@ -198,16 +244,21 @@ class ImageClassifier:
         image_name = Path(image_path).stem
         result_file = output_dir / f"{image_name}_classification.json"
         
+        timestamp = datetime.now().isoformat()
         result_data = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": timestamp,
             "image_file": Path(image_path).name,
             "image_path": str(image_path),
             "classification": classification,
-            "processed_at": datetime.now().isoformat()
+            "processed_at": timestamp
         }
         
-        with open(result_file, 'w') as f:
-            json.dump(result_data, f, indent=2)
+        # Serialize once and swap the file in whole so readers never see a partial write
+        data = json.dumps(result_data, separators=(',', ':')).encode('utf-8')
+        tmp_file = result_file.with_name(result_file.name + '.tmp')
+        with open(tmp_file, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_file, result_file)
         
-        print(f"💾 Result saved to: {result_file.name}")
+        logger.debug("💾 Result saved to: %s", result_file.name)
         return str(result_file)
\ No newline at end of file
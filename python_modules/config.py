@@ -21,6 +21,11 @@ class Config:
     CLASSIFICATION_TASK = os.getenv('CLASSIFICATION_TASK', '<DETAILED_CAPTION>')
     
     ALERT_COOLDOWN_SECONDS = int(os.getenv('ALERT_COOLDOWN_SECONDS', '10'))
+    
+    # Logging Configuration
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()  # DEBUG shows per-frame details
+    STATS_LOG_INTERVAL = int(os.getenv('STATS_LOG_INTERVAL', '10'))  # Frames between session stats at INFO
+    
     # Paths
     CAPTURED_FRAMES_DIR = os.getenv('CAPTURED_FRAMES_DIR', './data/captured_frames')
     CLASSIFICATION_RESULTS_DIR = os.getenv('CLASSIFICATION_RESULTS_DIR', './data/classification_results')
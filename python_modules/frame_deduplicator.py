@@ -1,9 +1,15 @@
 import cv2
-import numpy as np
+import logging
 from pathlib import Path
+from ._hash_numba import dhash_similarity
+
+# Difference hash size: HASH_SIZE x HASH_SIZE bits from a (HASH_SIZE + 1)-wide thumbnail
+HASH_SIZE = 8
+
+logger = logging.getLogger(__name__)
 
 class FrameDeduplicator:
-    def __init__(self, similarity_threshold=0.95):
+    def __init__(self, similarity_threshold=0.94):
         """
         Initialize frame deduplicator
         
@@ -21,25 +27,34 @@ class FrameDeduplicator:
             tuple: (is_duplicate: bool, similarity: float)
         """
         try:
-            # Read and resize frame for faster comparison
             frame = cv2.imread(str(image_path))
             if frame is None:
                 return False, 0
             
-            # Resize to small size for fast comparison
-            small = cv2.resize(frame, (64, 64))
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
             
-            # Compute perceptual hash
-            current_hash = self._compute_hash(small)
+        except Exception as e:
+            logger.warning("⚠️  Deduplication error: %s", e)
+            return False, 0
+        
+        return self.is_duplicate_gray(gray)
+    
+    def is_duplicate_gray(self, gray):
+        """
+        Check if an already decoded grayscale frame is duplicate of previous frame
+        
+        Returns:
+            tuple: (is_duplicate: bool, similarity: float)
+        """
+        try:
+            # Compute perceptual hash and compare with previous frame
+            current_hash, similarity = dhash_similarity(self._thumbnail(gray), self.prev_hash or 0)
             
             # First frame
             if self.prev_hash is None:
                 self.prev_hash = current_hash
                 return False, 0
             
-            # Compare with previous frame
-            similarity = self._compare_hashes(self.prev_hash, current_hash)
-            
             # Update hash
             self.prev_hash = current_hash
             
@@ -49,22 +64,26 @@ class FrameDeduplicator:
             return is_dup, similarity
             
         except Exception as e:
-            print(f"⚠️  Deduplication error: {e}")
+            logger.warning("⚠️  Deduplication error: %s", e)
             return False, 0
     
-    def _compute_hash(self, image):
-        """Compute perceptual hash of image"""
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        # Average hash
-        avg = gray.mean()
-        return (gray > avg).flatten()
+    def remember_gray(self, gray):
+        """
+        Record a frame's hash as the reference for the next frame, without comparing
+        
+        Returns:
+            int: The frame's hash, or None if it could not be computed
+        """
+        try:
+            self.prev_hash = dhash_similarity(self._thumbnail(gray), 0)[0]
+        except Exception as e:
+            logger.warning("⚠️  Deduplication error: %s", e)
+            self.prev_hash = None
+        return self.prev_hash
     
-    def _compare_hashes(self, hash1, hash2):
-        """Compare two hashes (returns similarity 0-1)"""
-        if len(hash1) != len(hash2):
-            return 0
-        matches = np.sum(hash1 == hash2)
-        return matches / len(hash1)
+    def _thumbnail(self, gray):
+        """Resize to small size for fast comparison"""
+        return cv2.resize(gray, (HASH_SIZE + 1, HASH_SIZE), interpolation=cv2.INTER_AREA)
     
     def reset(self):
         """Reset deduplicator"""
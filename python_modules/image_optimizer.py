@@ -3,11 +3,17 @@ Image Optimization Module
 Compress images for faster upload without quality loss
 """
 import cv2
+import logging
 from pathlib import Path
-from PIL import Image
-import io
+
+logger = logging.getLogger(__name__)
 
 class ImageOptimizer:
+    # Longest image side kept after resizing
+    MAX_DIMENSION = 1280
+    # JPEG qualities tried, highest first, until the target size fits
+    QUALITY_LADDER = (85, 75, 65, 55)
+    
     def __init__(self, max_size_kb=100, quality=85):
         """
         Initialize image optimizer
@@ -31,29 +37,86 @@ class ImageOptimizer:
             if file_size_kb <= self.max_size_kb:
                 return image_path  # Already small enough
             
-            print(f"📦 Compressing image: {file_size_kb:.1f}KB → target {self.max_size_kb}KB")
-            
-            # Open image
-            img = Image.open(image_path)
-            
-            # Convert to RGB if needed
-            if img.mode in ('RGBA', 'LA', 'P'):
-                img = img.convert('RGB')
+            image_data = self._compress(image_path, file_size_kb)
             
-            # Resize if very large
-            max_dimension = 1280
-            if max(img.size) > max_dimension:
-                img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
-            
-            # Save with compression
             optimized_path = Path(image_path).parent / f"opt_{Path(image_path).name}"
-            img.save(optimized_path, 'JPEG', quality=self.quality, optimize=True)
-            
-            new_size_kb = optimized_path.stat().st_size / 1024
-            print(f"✅ Compressed: {new_size_kb:.1f}KB (saved {file_size_kb - new_size_kb:.1f}KB)")
+            optimized_path.write_bytes(image_data)
             
             return str(optimized_path)
-            
+        
         except Exception as e:
-            print(f"⚠️  Optimization failed: {e}")
-            return image_path  # Return original if fails
\ No newline at end of file
+            logger.warning("⚠️  Optimization failed: %s", e)
+            return image_path  # Return original if fails
+    
+    def optimize_bytes(self, image_path, frame=None):
+        """
+        Optimize image in memory
+        Returns optimized JPEG bytes or the original file bytes if small enough
+        
+        Args:
+            image_path: Path to the image file
+            frame: Already decoded BGR frame of image_path, if available
+        """
+        file_size_kb = Path(image_path).stat().st_size / 1024
+        
+        if file_size_kb > self.max_size_kb:
+            try:
+                return self._compress(image_path, file_size_kb, frame)
+            except Exception as e:
+                logger.warning("⚠️  Optimization failed: %s", e)
+        
+        return Path(image_path).read_bytes()
+    
+    def encode(self, bgr, target_kb=None):
+        """
+        Encode an already decoded frame as JPEG bytes, without touching disk
+        
+        Args:
+            bgr: Decoded BGR frame
+            target_kb: Target maximum size in KB (default: max_size_kb)
+            
+        Returns:
+            bytes: JPEG at the highest ladder quality that fits target_kb,
+                or at the lowest one if none fits
+        """
+        max_bytes = (target_kb or self.max_size_kb) * 1024
+        
+        # Resize if very large
+        height, width = bgr.shape[:2]
+        if max(height, width) > self.MAX_DIMENSION:
+            scale = self.MAX_DIMENSION / max(height, width)
+            new_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            bgr = cv2.resize(bgr, new_size, interpolation=cv2.INTER_AREA)
+        
+        qualities = [self.quality] + [q for q in self.QUALITY_LADDER if q < self.quality]
+        for quality in qualities:
+            buf = self._encode(bgr, quality)
+            if len(buf) <= max_bytes:
+                break
+        
+        return buf.tobytes()
+    
+    def _compress(self, image_path, file_size_kb, frame=None):
+        """Decode if needed and re-encode an image to fit max_size_kb"""
+        logger.debug("📦 Compressing image: %.1fKB → target %sKB", file_size_kb, self.max_size_kb)
+        
+        img = frame if frame is not None else cv2.imread(str(image_path))
+        if img is None:
+            raise ValueError(f"Could not decode image: {image_path}")
+        
+        image_data = self.encode(img)
+        
+        new_size_kb = len(image_data) / 1024
+        logger.debug("✅ Compressed: %.1fKB (saved %.1fKB)", new_size_kb, file_size_kb - new_size_kb)
+        
+        return image_data
+    
+    def _encode(self, img, quality):
+        """Encode an image as an optimized JPEG buffer"""
+        ok, buf = cv2.imencode('.jpg', img, [
+            int(cv2.IMWRITE_JPEG_QUALITY), quality,
+            int(cv2.IMWRITE_JPEG_OPTIMIZE), 1
+        ])
+        if not ok:
+            raise ValueError("JPEG encoding failed")
+        return buf
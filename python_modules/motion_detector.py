@@ -3,22 +3,40 @@ Motion Detection Module
 Skips frames with no motion to save API calls and speed up response
 """
 import cv2
-import numpy as np
+import logging
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
 class MotionDetector:
-    def __init__(self, threshold=25, min_change_percent=0.5):
+    def __init__(self, threshold=25, min_change_percent=0.5, work_width=320, single_diff_percent=2.0):
         """
         Initialize motion detector
         
         Args:
             threshold: Pixel difference threshold (0-255)
             min_change_percent: Minimum % of frame that must change (0.5 = 0.5%)
+            work_width: Width frames are downscaled to before comparison
+            single_diff_percent: % of frame changed since the last frame alone that
+                counts as motion even without earlier history (new object in view)
         """
         self.prev_frame = None
+        self.prev_mask = None
         self.threshold = threshold
         self.min_change_percent = min_change_percent
+        self.work_width = work_width
+        self.single_diff_percent = single_diff_percent
+        # Whether the last result came from comparing with a previous frame
+        self.had_reference = False
         self.frame_count = 0
+        self._clear_buffers()
+    
+    def _clear_buffers(self):
+        """Drop the working buffers reused between frames"""
+        self._spare_frame = None
+        self._delta = None
+        self._mask = None
+        self._motion = None
     
     def detect_motion(self, image_path):
         """
@@ -27,50 +45,95 @@ class MotionDetector:
         Returns:
             tuple: (has_motion: bool, motion_percent: float)
         """
-        self.frame_count += 1
-        
         try:
             # Read and preprocess frame
             frame = cv2.imread(str(image_path))
             if frame is None:
+                self.frame_count += 1
                 return True, 0  # Process if can't read
             
-            # Convert to grayscale and blur to reduce noise
             gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            gray = cv2.GaussianBlur(gray, (21, 21), 0)
             
-            # First frame - always process
-            if self.prev_frame is None:
+        except Exception as e:
+            logger.warning("⚠️  Motion detection error: %s", e)
+            return True, 0  # Process frame if error
+        
+        return self.detect_motion_gray(gray)
+    
+    def detect_motion_gray(self, gray):
+        """
+        Detect if there's significant motion in an already decoded grayscale frame
+        
+        Uses three-frame differencing to reject noise: pixels that changed both
+        from the frame before last to the last frame and from the last frame to
+        this one count as motion, which filters sensor noise and lighting flicker
+        without blurring or dilating the mask. An object that appears between two
+        captures has no earlier change to intersect with, so a larger change
+        against the last frame alone (single_diff_percent) also counts as motion.
+        
+        The thresholded difference of the previous two frames is kept from the
+        last call, and all intermediate images are written into buffers that
+        are reused from frame to frame.
+        
+        Returns:
+            tuple: (has_motion: bool, motion_percent: float)
+        """
+        self.frame_count += 1
+        self.had_reference = False
+        
+        try:
+            # Downscale to the working width (motion percent is scale-invariant)
+            height, width = gray.shape[:2]
+            if width > self.work_width:
+                scale = self.work_width / width
+                small_size = (self.work_width, max(1, int(height * scale)))
+                gray = cv2.resize(gray, small_size, dst=self._spare_frame, interpolation=cv2.INTER_AREA)
+            
+            # First frame (or resolution change) - always process
+            if self.prev_frame is None or self.prev_frame.shape != gray.shape:
                 self.prev_frame = gray
+                self.prev_mask = None
+                self._clear_buffers()
                 return True, 100.0
             
-            # Compute absolute difference between current and previous frame
-            frame_delta = cv2.absdiff(self.prev_frame, gray)
+            # Threshold the difference between the previous and current frame
+            self._delta = cv2.absdiff(self.prev_frame, gray, dst=self._delta)
+            mask = cv2.threshold(self._delta, self.threshold, 255, cv2.THRESH_BINARY, dst=self._mask)[1]
             
-            # Apply threshold to get binary image
-            thresh = cv2.threshold(frame_delta, self.threshold, 255, cv2.THRESH_BINARY)[1]
+            self.had_reference = True
             
-            # Dilate to fill gaps
-            thresh = cv2.dilate(thresh, None, iterations=2)
+            # Calculate percentage of frame that changed since the last frame
+            total_pixels = mask.size
+            diff_percent = (cv2.countNonZero(mask) / total_pixels) * 100
             
-            # Calculate percentage of frame that changed
-            motion_pixels = np.sum(thresh > 0)
-            total_pixels = thresh.size
-            motion_percent = (motion_pixels / total_pixels) * 100
+            # Keep only pixels that also changed between the two previous frames
+            # (second frame has no earlier history and uses the plain difference)
+            if self.prev_mask is not None:
+                self._motion = cv2.bitwise_and(self.prev_mask, mask, dst=self._motion)
+                motion_percent = (cv2.countNonZero(self._motion) / total_pixels) * 100
+            else:
+                motion_percent = diff_percent
             
-            # Update previous frame
-            self.prev_frame = gray
+            # Update history by swapping buffers instead of copying
+            self._spare_frame, self.prev_frame = self.prev_frame, gray
+            self._mask, self.prev_mask = self.prev_mask, mask
             
-            # Motion detected if change exceeds threshold
+            # Motion detected if the noise-filtered change exceeds threshold,
+            # or the change since the last frame alone is large (new object)
             has_motion = motion_percent >= self.min_change_percent
+            if not has_motion and diff_percent >= self.single_diff_percent:
+                has_motion, motion_percent = True, diff_percent
             
             return has_motion, motion_percent
             
         except Exception as e:
-            print(f"⚠️  Motion detection error: {e}")
+            logger.warning("⚠️  Motion detection error: %s", e)
             return True, 0  # Process frame if error
     
     def reset(self):
         """Reset motion detector (call when stream restarts)"""
         self.prev_frame = None
-        self.frame_count = 0
\ No newline at end of file
+        self.prev_mask = None
+        self.had_reference = False
+        self.frame_count = 0
+        self._clear_buffers()
\ No newline at end of file
@@ -1,54 +1,197 @@
 import requests
+import json
+import os
 import time
+import logging
+import threading
+from hashlib import blake2b
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from .config import Config
 
+try:
+    from requests_toolbelt import MultipartEncoder
+except ImportError:
+    MultipartEncoder = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+# Telegram's sendPhoto upload limit
+MAX_PHOTO_BYTES = 10 * 1024 * 1024
+
+ALERT_EMOJI = {
+    'CRITICAL': '🚨',
+    'HIGH': '⚠️',
+    'MEDIUM': '⚡',
+    'LOW': '🔔',
+    'NONE': '✅'
+}
+
+def _dumps(data):
+    """Serialize a request body to JSON bytes, with orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data).encode('utf-8')
+
+logger = logging.getLogger(__name__)
+
 class TelegramNotifier:
-    # Class variable to track last alert time (persists across instances)
+    # Class variable to track last alert time per (level, caption digest) (persists across instances)
     _last_alert_time = {}
     _alert_cooldown_seconds = Config.ALERT_COOLDOWN_SECONDS  # Don't send same alert within 30 seconds
+    # Expired cooldowns are pruned once this many are tracked
+    _max_tracked_alerts = 64
+    # Cooldowns are released from the alert workers when a delivery fails
+    _cooldown_lock = threading.Lock()
+    # Background senders shared by all instances so alerts never block the caller
+    ALERT_WORKERS = 2
+    _executor = ThreadPoolExecutor(max_workers=ALERT_WORKERS, thread_name_prefix='tg-alert')
     
     def __init__(self):
         self.enabled = Config.TELEGRAM_ENABLED
         self.bot_token = Config.TELEGRAM_BOT_TOKEN
         self.chat_id = Config.TELEGRAM_CHAT_ID
         self.api_url = f"https://api.telegram.org/bot{self.bot_token}"
+        
+        # Keep-alive session so repeated alerts reuse the TLS connection
+        self._session = requests.Session()
+        self._session.headers['User-Agent'] = 'aerialintelligence-alerts'
+        # Transient failures and rate limits (429 + Retry-After) are retried here;
+        # the last response is returned so its error is logged
+        # Pool sized so every alert worker (plus test_connection) gets a connection
+        # without blocking; only api.telegram.org is ever contacted
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.ALERT_WORKERS + 2,
+            pool_block=False,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["POST", "GET"],
+                respect_retry_after_header=True,
+                raise_on_status=False
+            )
+        )
+        self._session.mount('https://', adapter)
+        
+        if MultipartEncoder is not None:
+            # A streamed upload cannot be replayed, so photo uploads are not retried
+            self._session.mount(f"{self.api_url}/sendPhoto", HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=self.ALERT_WORKERS + 2,
+                pool_block=False,
+                max_retries=0
+            ))
+    
+    def close(self):
+        """Close the HTTP session"""
+        self._session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
     
     def send_alert(self, threat_analysis, image_path=None):
         """
-        Send security alert to Telegram
-        Note: Debouncing is handled by Node.js server
+        Send security alert to Telegram in the background
+        
+        Alerts with the same level and caption as one sent within the
+        cooldown are dropped before any formatting or I/O.
+        
+        Returns:
+            Future: Resolves to True once the alert has been delivered,
+                or None if the alert was debounced
         """
         if not self.enabled:
-            print("📱 Telegram notifications disabled")
-            return False
+            logger.debug("📱 Telegram notifications disabled")
+            future = Future()
+            future.set_result(False)
+            return future
         
         level = threat_analysis['threat_level']
-        print(f"\n🚨 Sending {level} priority alert to Telegram")
+        alert_key = self._alert_key(threat_analysis)
+        if self._should_debounce(alert_key):
+            logger.info("⏸️  Alert debounced: %s (cooldown active)", level)
+            return None
+        
+        # Start the cooldown on dispatch so alerts still in flight debounce later ones
+        reserved_at = self._update_last_alert_time(alert_key)
+        
+        logger.info("🚨 Sending %s priority alert to Telegram", level)
         
         # Format message
         message = self._format_alert_message(threat_analysis)
         
-        # Send with image if available
-        if image_path and Path(image_path).exists():
-            return self._send_photo(image_path, message)
-        else:
-            return self._send_message(message)
+        future = self._executor.submit(self._send_photo_or_text, image_path, message)
+        future.add_done_callback(lambda done: self._release_failed_alert(alert_key, reserved_at, done))
+        return future
+    
+    def _send_photo_or_text(self, image_path, message):
+        """Send the alert with its image if available (runs on the executor)"""
+        try:
+            # Send with image if available (falls back to text if it is missing)
+            if image_path:
+                return self._send_photo(image_path, message)
+            else:
+                return self._send_message(message)
+        except Exception:
+            logger.exception("❌ Unexpected error sending alert")
+            return False
     
-    def _should_debounce(self, threat_level):
+    def _alert_key(self, threat_analysis):
+        """Identify an alert by its threat level and a digest of its caption"""
+        caption = threat_analysis['classification'][:128]
+        digest = blake2b(caption.encode('utf-8'), digest_size=8).digest()
+        return threat_analysis['threat_level'], digest
+    
+    def _should_debounce(self, alert_key):
         """Check if alert should be debounced (too soon since last alert)"""
-        current_time = time.time()
+        current_time = time.monotonic()
         
-        # Check last alert time for this threat level
-        if threat_level in self._last_alert_time:
-            time_since_last = current_time - self._last_alert_time[threat_level]
+        # Check last alert time for this alert
+        if alert_key in self._last_alert_time:
+            time_since_last = current_time - self._last_alert_time[alert_key]
             return time_since_last < self._alert_cooldown_seconds
         
         return False
     
-    def _update_last_alert_time(self, threat_level):
-        """Update last alert time for this threat level"""
-        self._last_alert_time[threat_level] = time.time()
+    def _update_last_alert_time(self, alert_key):
+        """
+        Update last alert time for this alert, pruning expired cooldowns
+        
+        Returns:
+            float: The recorded alert time
+        """
+        current_time = time.monotonic()
+        with self._cooldown_lock:
+            self._last_alert_time[alert_key] = current_time
+            
+            if len(self._last_alert_time) > self._max_tracked_alerts:
+                cutoff = current_time - self._alert_cooldown_seconds
+                for key in [k for k, t in self._last_alert_time.items() if t < cutoff]:
+                    del self._last_alert_time[key]
+        
+        return current_time
+    
+    def _release_failed_alert(self, alert_key, reserved_at, future):
+        """Drop the cooldown of an alert that was not delivered, so it can be retried"""
+        if not future.cancelled() and future.result():
+            return
+        
+        with self._cooldown_lock:
+            # Keep the cooldown if a later alert has already renewed it
+            if self._last_alert_time.get(alert_key) == reserved_at:
+                del self._last_alert_time[alert_key]
     
     @classmethod
     def set_cooldown(cls, seconds):
@@ -60,38 +203,33 @@ class TelegramNotifier:
         """Reset all alert cooldowns (useful for testing)"""
         cls._last_alert_time.clear()
     
+    @classmethod
+    def shutdown(cls, wait=True):
+        """Stop accepting alerts, by default waiting for queued ones to be sent"""
+        cls._executor.shutdown(wait=wait)
+    
     def _format_alert_message(self, analysis):
         """Format alert message for Telegram"""
-        emoji_map = {
-            'CRITICAL': '🚨',
-            'HIGH': '⚠️',
-            'MEDIUM': '⚡',
-            'LOW': '🔔',
-            'NONE': '✅'
-        }
-        
         level = analysis['threat_level']
-        emoji = emoji_map.get(level, '📢')
+        emoji = ALERT_EMOJI.get(level, '📢')
         
-        message = f"{emoji} SAFETY ALERT - {level} PRIORITY {emoji}\n\n"
-        message += f"⏰ Time: {analysis['timestamp']}\n\n"
-        message += f"🔍 DETECTED SITUATION:\n{analysis['classification']}\n\n"
+        parts = [
+            f"{emoji} SAFETY ALERT - {level} PRIORITY {emoji}\n\n",
+            f"⏰ Time: {analysis['timestamp']}\n\n",
+            f"🔍 DETECTED SITUATION:\n{analysis['classification']}\n\n"
+        ]
         
         if analysis['threat_reasons']:
-            message += "⚠️ THREAT INDICATORS:\n"
-            for reason in analysis['threat_reasons'][:5]:
-                # Extract just the keyword
-                if ':' in reason:
-                    keyword = reason.split(':')[-1].strip()
-                    message += f"• {keyword}\n"
-            message += "\n"
+            parts.append("⚠️ THREAT INDICATORS:\n")
+            parts.extend(f"• {keyword}\n" for score, keyword in analysis['threat_reasons'][:5])
+            parts.append("\n")
         
-        message += "📱 This is an automated safety monitoring alert.\n"
+        parts.append("📱 This is an automated safety monitoring alert.\n")
         
-        if level in ['HIGH', 'CRITICAL']:
-            message += f"{emoji} IMMEDIATE ATTENTION REQUIRED {emoji}"
+        if level in ('HIGH', 'CRITICAL'):
+            parts.append(f"{emoji} IMMEDIATE ATTENTION REQUIRED {emoji}")
         
-        return message
+        return "".join(parts)
     
     def _send_message(self, text):
         """Send text message to Telegram"""
@@ -103,17 +241,17 @@ class TelegramNotifier:
                 'parse_mode': 'HTML'
             }
             
-            response = requests.post(url, json=data, timeout=10)
+            response = self._session.post(url, data=_dumps(data), headers=JSON_HEADERS, timeout=10)
             
             if response.status_code == 200:
-                print("✅ Alert sent successfully")
+                logger.info("✅ Alert sent successfully")
                 return True
             else:
-                print(f"❌ Failed to send alert: {response.text}")
+                logger.error("❌ Failed to send alert: %s", response.text)
                 return False
                 
-        except Exception as e:
-            print(f"❌ Error sending alert: {e}")
+        except requests.exceptions.RequestException as e:
+            logger.error("❌ Error sending alert: %s", e)
             return False
     
     def _send_photo(self, image_path, caption):
@@ -121,25 +259,46 @@ class TelegramNotifier:
         try:
             url = f"{self.api_url}/sendPhoto"
             
-            with open(image_path, 'rb') as photo:
-                files = {'photo': photo}
-                data = {
-                    'chat_id': self.chat_id,
-                    'caption': caption
-                }
+            try:
+                photo = open(image_path, 'rb')
+            except FileNotFoundError:
+                logger.warning("⚠️  Alert image not found, sending text only: %s", image_path)
+                return self._send_message(caption)
+            
+            with photo:
+                # Skip uploads Telegram would reject
+                if os.fstat(photo.fileno()).st_size > MAX_PHOTO_BYTES:
+                    logger.warning("⚠️  Alert image over 10MB, sending text only: %s", image_path)
+                    return self._send_message(caption)
                 
-                response = requests.post(url, files=files, data=data, timeout=30)
+                if MultipartEncoder is not None:
+                    # Stream the file from disk instead of building the body in memory
+                    body = MultipartEncoder(fields={
+                        'chat_id': str(self.chat_id),
+                        'caption': caption,
+                        'photo': (Path(image_path).name, photo, 'image/jpeg')
+                    })
+                    headers = {'Content-Type': body.content_type}
+                    response = self._session.post(url, data=body, headers=headers, timeout=30)
+                else:
+                    files = {'photo': photo}
+                    data = {
+                        'chat_id': self.chat_id,
+                        'caption': caption
+                    }
+                    
+                    response = self._session.post(url, files=files, data=data, timeout=30)
             
             if response.status_code == 200:
-                print("✅ Alert with image sent successfully")
+                logger.info("✅ Alert with image sent successfully")
                 return True
             else:
-                print(f"❌ Failed to send photo: {response.text}")
+                logger.warning("❌ Failed to send photo: %s", response.text)
                 # Fallback to text only
                 return self._send_message(caption)
                 
-        except Exception as e:
-            print(f"❌ Error sending photo: {e}")
+        except (requests.exceptions.RequestException, OSError) as e:
+            logger.warning("❌ Error sending photo: %s", e)
             # Fallback to text only
             return self._send_message(caption)
     
@@ -147,16 +306,16 @@ class TelegramNotifier:
         """Test Telegram bot connection"""
         try:
             url = f"{self.api_url}/getMe"
-            response = requests.get(url, timeout=10)
+            response = self._session.get(url, timeout=10)
             
             if response.status_code == 200:
                 bot_info = response.json()['result']
-                print(f"✅ Telegram bot connected: @{bot_info['username']}")
+                logger.info("✅ Telegram bot connected: @%s", bot_info['username'])
                 return True
             else:
-                print(f"❌ Telegram connection failed: {response.text}")
+                logger.error("❌ Telegram connection failed: %s", response.text)
                 return False
                 
         except Exception as e:
-            print(f"❌ Telegram test failed: {e}")
+            logger.error("❌ Telegram test failed: %s", e)
             return False
\ No newline at end of file
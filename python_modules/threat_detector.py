@@ -1,11 +1,76 @@
-import re
+import logging
 from datetime import datetime
+from functools import lru_cache
 from .config import Config
+from ._pattern_scan import PatternScanner
+
+logger = logging.getLogger(__name__)
+
+# (severity, score) of the threat pattern groups, in check order
+THREAT_SEVERITIES = (
+    ('critical', 5),
+    ('high', 4),
+    ('medium', 3),
+)
+
+# Score of the reason reporting the number of normal activity indicators
+NORMAL_REASON_SCORE = 1
+
+# Label of each threat reason score when rendered as text
+REASON_LABELS = {
+    5: 'Critical threat',
+    4: 'High threat',
+    3: 'Medium threat',
+    NORMAL_REASON_SCORE: 'Normal activity indicators'
+}
+
+SUMMARY_EMOJI = {
+    'CRITICAL': '🚨',
+    'HIGH': '⚠️',
+    'MEDIUM': '⚡',
+    'LOW': '👁️',
+    'NONE': '✅'
+}
+
+RECOMMENDED_ACTIONS = {
+    'CRITICAL': 'immediate_response',
+    'HIGH': 'investigate_immediately',
+    'MEDIUM': 'monitor_closely',
+    'LOW': 'log_for_review',
+    'NONE': 'none'
+}
+
+def format_reason(reason):
+    """Render a (score, keyword) threat reason as text, e.g. 'Critical threat: gun'"""
+    score, keyword = reason
+    return f"{REASON_LABELS[score]}: {keyword}"
+
+class ThreatAnalysis(dict):
+    """Threat analysis result dict"""
+    
+    def formatted_reasons(self):
+        """Threat reasons rendered as text"""
+        return [format_reason(reason) for reason in self['threat_reasons']]
 
 class ThreatDetector:
     def __init__(self):
         self.threshold = Config.THREAT_THRESHOLD
         self.threat_patterns = self._initialize_patterns()
+        
+        # All severities share one scanner; severity -> ids of its patterns
+        self.severity_ids = {}
+        all_patterns = []
+        for severity, patterns in self.threat_patterns.items():
+            self.severity_ids[severity] = range(len(all_patterns), len(all_patterns) + len(patterns))
+            all_patterns.extend(patterns)
+        self.scanner = PatternScanner(all_patterns)
+        
+        # Captions repeat across frames of the same scene
+        self._score_text = lru_cache(maxsize=1024)(self._score_text)
+    
+    def cache_clear(self):
+        """Clear the cache of analyzed classification texts"""
+        self._score_text.cache_clear()
     
     def _initialize_patterns(self):
         """Initialize threat detection patterns"""
@@ -46,49 +111,17 @@ class ThreatDetector:
         """
         Analyze classification for threats
         
+        Once a critical indicator is found, high and medium indicators are not
+        checked, so they are neither listed in threat_reasons nor counted in
+        the confidence.
+        
         Returns:
             dict: Threat analysis results
         """
-        print(f"\n🔍 Analyzing threat for: {image_file}")
+        logger.debug("🔍 Analyzing threat for: %s", image_file)
         
-        text = classification_text.lower()
-        threat_score = 1
-        threat_reasons = []
-        detected_patterns = []
-        
-        # Check critical threats
-        for pattern in self.threat_patterns['critical']:
-            if re.search(pattern, text, re.IGNORECASE):
-                threat_score = max(threat_score, 5)
-                match = re.search(pattern, text, re.IGNORECASE)
-                threat_reasons.append(f"Critical threat: {match.group(0)}")
-                detected_patterns.append('CRITICAL')
-        
-        # Check high threats
-        for pattern in self.threat_patterns['high']:
-            if re.search(pattern, text, re.IGNORECASE):
-                threat_score = max(threat_score, 4)
-                match = re.search(pattern, text, re.IGNORECASE)
-                threat_reasons.append(f"High threat: {match.group(0)}")
-                detected_patterns.append('HIGH')
-        
-        # Check medium threats
-        for pattern in self.threat_patterns['medium']:
-            if re.search(pattern, text, re.IGNORECASE):
-                threat_score = max(threat_score, 3)
-                match = re.search(pattern, text, re.IGNORECASE)
-                threat_reasons.append(f"Medium threat: {match.group(0)}")
-                detected_patterns.append('MEDIUM')
-        
-        # Check for normal indicators (reduce score)
-        normal_count = 0
-        for pattern in self.threat_patterns['normal']:
-            if re.search(pattern, text, re.IGNORECASE):
-                normal_count += 1
-        
-        if normal_count > 0:
-            threat_score = max(1, threat_score - normal_count)
-            threat_reasons.append(f"Normal activity indicators: {normal_count}")
+        threat_score, threat_reasons, normal_count = self._score_text(classification_text.lower())
+        threat_reasons = list(threat_reasons)
         
         # Determine threat level
         threat_level = self._get_threat_level(threat_score)
@@ -97,7 +130,7 @@ class ThreatDetector:
         confidence = self._calculate_confidence(len(threat_reasons), normal_count)
         
         # Create analysis result
-        analysis = {
+        analysis = ThreatAnalysis({
             'timestamp': datetime.now().isoformat(),
             'image_file': image_file,
             'classification': classification_text,
@@ -107,21 +140,57 @@ class ThreatDetector:
             'threat_reasons': threat_reasons,
             'confidence': confidence,
             'recommended_action': self._get_recommended_action(threat_level)
-        }
+        })
+        
+        # Log analysis
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📊 Threat Analysis:")
+            logger.debug("   Level: %s", threat_level)
+            logger.debug("   Score: %s/5", threat_score)
+            logger.debug("   Alert: %s", 'YES' if analysis['threat_detected'] else 'NO')
+            logger.debug("   Confidence: %s%%", confidence)
+            
+            if threat_reasons:
+                logger.debug("   Reasons:")
+                for reason in threat_reasons[:3]:
+                    logger.debug("      • %s", format_reason(reason))
         
-        # Print analysis
-        print(f"📊 Threat Analysis:")
-        print(f"   Level: {threat_level}")
-        print(f"   Score: {threat_score}/5")
-        print(f"   Alert: {'YES' if analysis['threat_detected'] else 'NO'}")
-        print(f"   Confidence: {confidence}%")
+        return analysis
+    
+    def _score_text(self, text):
+        """
+        Match a lowercased classification against the threat patterns
+        (cached per instance, see __init__)
         
-        if threat_reasons:
-            print(f"   Reasons:")
-            for reason in threat_reasons[:3]:
-                print(f"      • {reason}")
+        Returns:
+            tuple: (threat_score: int, threat_reasons: tuple of (score, keyword), normal_count: int)
+        """
+        threat_score = 1
+        threat_reasons = []
         
-        return analysis
+        # Scan all patterns in one pass
+        scan = self.scanner.scan(text)
+        
+        # Check critical, high and medium threats
+        for severity, score in THREAT_SEVERITIES:
+            # Lower severities cannot raise a CRITICAL score, so stop once one is found
+            if threat_score >= 5:
+                break
+            
+            for pattern_id in self.severity_ids[severity]:
+                match = scan.match(pattern_id)
+                if match:
+                    threat_score = max(threat_score, score)
+                    threat_reasons.append((score, match))
+        
+        # Check for normal indicators (reduce score)
+        normal_count = sum(1 for pattern_id in self.severity_ids['normal'] if scan.match(pattern_id))
+        
+        if normal_count > 0:
+            threat_score = max(1, threat_score - normal_count)
+            threat_reasons.append((NORMAL_REASON_SCORE, str(normal_count)))
+        
+        return threat_score, tuple(threat_reasons), normal_count
     
     def _get_threat_level(self, score):
         """Convert score to threat level"""
@@ -150,28 +219,13 @@ class ThreatDetector:
     
     def _get_recommended_action(self, threat_level):
         """Get recommended action for threat level"""
-        actions = {
-            'CRITICAL': 'immediate_response',
-            'HIGH': 'investigate_immediately',
-            'MEDIUM': 'monitor_closely',
-            'LOW': 'log_for_review',
-            'NONE': 'none'
-        }
-        return actions.get(threat_level, 'none')
+        return RECOMMENDED_ACTIONS.get(threat_level, 'none')
     
     def generate_summary(self, analysis):
         """Generate human-readable threat summary"""
-        emoji = {
-            'CRITICAL': '🚨',
-            'HIGH': '⚠️',
-            'MEDIUM': '⚡',
-            'LOW': '👁️',
-            'NONE': '✅'
-        }
-        
         level = analysis['threat_level']
         summary = [
-            f"{emoji[level]} THREAT LEVEL: {level}",
+            f"{SUMMARY_EMOJI[level]} THREAT LEVEL: {level}",
             f"🎯 Confidence: {analysis['confidence']}%",
             f"📊 Score: {analysis['threat_score']}/5",
             f"📷 Image: {analysis['image_file']}",
@@ -181,6 +235,6 @@ class ThreatDetector:
         if analysis['threat_reasons']:
             summary.append("\n📝 Threat Indicators:")
             for reason in analysis['threat_reasons'][:5]:
-                summary.append(f"   • {reason}")
+                summary.append(f"   • {format_reason(reason)}")
         
         return "\n".join(summary)
\ No newline at end of file
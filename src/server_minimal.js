@@ -128,95 +128,155 @@ function captureAndProcess(streamPath) {
   });
 }
 
+// ===== PERSISTENT PYTHON WORKER =====
+// One long-lived `process_frame.py --daemon` process handles every frame, so
+// interpreter startup and OpenCV/requests imports are paid once per server run.
+let pythonWorker = null;
+let pythonOutput = "";
+let pendingFrame = null;
+
 /**
- * Call Python script to process frame
+ * Start the Python frame processor in daemon mode
  */
-function processWithPython(imagePath) {
-  currentlyProcessing++;
-  
-  const processStart = Date.now();
-  const frameNum = stats.captured;
-  
-  console.log(`\n🐍 [${new Date().toLocaleTimeString()}] Processing frame ${frameNum}...`);
-  
-  const python = spawn("python3", ["process_frame.py", imagePath], {
+function startPythonWorker() {
+  const worker = spawn("python3", ["process_frame.py", "--daemon"], {
     cwd: path.join(__dirname, "..")
   });
-  
-  let output = "";
-  let pythonResult = null;
-
-  python.stdout.on("data", (data) => {
-    const text = data.toString();
-    output += text;
-    
-    // Look for Python result JSON
-    if (text.includes("PYTHON_RESULT:")) {
-      try {
-        const jsonStr = text.split("PYTHON_RESULT:")[1].trim();
-        pythonResult = JSON.parse(jsonStr);
-      } catch (e) {
-        console.log("⚠️  Failed to parse Python result");
-      }
-    }
-    
-    // Print Python output (but not the raw result JSON or dividers)
-    if (!text.includes("PYTHON_RESULT:") && !text.includes("====")) {
-      process.stdout.write(text);
+  pythonOutput = "";
+
+  worker.stdout.on("data", (data) => {
+    pythonOutput += data.toString();
+
+    // Handle complete lines; keep any partial line for the next chunk
+    let newline;
+    while ((newline = pythonOutput.indexOf("\n")) !== -1) {
+      const line = pythonOutput.slice(0, newline);
+      pythonOutput = pythonOutput.slice(newline + 1);
+      handlePythonLine(line);
     }
   });
 
-  python.stderr.on("data", (data) => {
+  worker.stderr.on("data", (data) => {
     console.error(`Python error: ${data}`);
   });
 
-  python.on("close", (code) => {
-    currentlyProcessing--;
-    const processTime = Date.now() - processStart;
-    
-    if (code === 0 && pythonResult) {
-      if (pythonResult.skipped) {
-        stats.skipped++;
-        console.log(`⏭️  Frame skipped: ${pythonResult.skip_reason} (${processTime}ms)`);
-      } else {
-        stats.processed++;
-        console.log(`✅ Processing complete in ${processTime}ms`);
-        
-        if (pythonResult.threat_analysis?.threat_detected) {
-          stats.threats++;
-          const threatLevel = pythonResult.threat_analysis.threat_level;
-          console.log(`🚨 THREAT DETECTED: ${threatLevel}`);
-          
-          // SERVER-LEVEL ALERT DEBOUNCING
-          if (pythonResult.alert_sent) {
-            // Python tried to send alert, check if we should actually send it
-            if (shouldSendAlert(threatLevel)) {
-              stats.alerts++;
-              console.log(`📱 Alert allowed - sent to Telegram`);
-            } else {
-              console.log(`📱 Alert blocked by server-level debouncing`);
-            }
-          }
-        }
-      }
-      
-      // Show efficiency stats every 10 frames
-      if ((stats.captured % 10) === 0) {
-        printStats();
-      }
-    } else {
-      console.log(`❌ Processing failed (code: ${code}, time: ${processTime}ms)`);
+  worker.stdin.on("error", (error) => {
+    console.log(`⚠️  Failed to write to Python worker: ${error.message}`);
+  });
+
+  worker.on("close", (code) => {
+    if (pythonWorker === worker) {
+      pythonWorker = null;
     }
-    
-    // Process next in queue
-    processQueue();
+    console.log(`⚠️  Python worker exited (code: ${code})`);
+    failPendingFrame(`worker exited with code ${code}`);
   });
 
-  python.on("error", (error) => {
-    currentlyProcessing--;
+  worker.on("error", (error) => {
+    if (pythonWorker === worker) {
+      pythonWorker = null;
+    }
     console.log(`❌ Failed to start Python: ${error.message}`);
-    processQueue();
+    failPendingFrame(error.message);
   });
+
+  pythonWorker = worker;
+}
+
+/**
+ * Handle one line of Python worker output
+ */
+function handlePythonLine(line) {
+  // Look for Python result JSON
+  if (line.startsWith("PYTHON_RESULT:")) {
+    let pythonResult = null;
+    try {
+      pythonResult = JSON.parse(line.slice("PYTHON_RESULT:".length));
+    } catch (e) {
+      console.log("⚠️  Failed to parse Python result");
+    }
+    finishPendingFrame(pythonResult);
+    return;
+  }
+
+  // Print Python output (but not dividers)
+  if (!line.includes("====")) {
+    console.log(line);
+  }
+}
+
+/**
+ * Send frame to the Python worker for processing
+ */
+function processWithPython(imagePath) {
+  currentlyProcessing++;
+
+  pendingFrame = { processStart: Date.now() };
+  const frameNum = stats.captured;
+
+  console.log(`\n🐍 [${new Date().toLocaleTimeString()}] Processing frame ${frameNum}...`);
+
+  if (!pythonWorker) {
+    startPythonWorker();
+  }
+  pythonWorker.stdin.write(imagePath + "\n");
+}
+
+/**
+ * Record the result of the frame currently being processed
+ */
+function finishPendingFrame(pythonResult) {
+  if (!pendingFrame) return;
+
+  const processTime = Date.now() - pendingFrame.processStart;
+  pendingFrame = null;
+  currentlyProcessing--;
+
+  if (pythonResult && pythonResult.success) {
+    if (pythonResult.skipped) {
+      stats.skipped++;
+      console.log(`⏭️  Frame skipped: ${pythonResult.skip_reason} (${processTime}ms)`);
+    } else {
+      stats.processed++;
+      console.log(`✅ Processing complete in ${processTime}ms`);
+
+      if (pythonResult.threat_analysis?.threat_detected) {
+        stats.threats++;
+        const threatLevel = pythonResult.threat_analysis.threat_level;
+        console.log(`🚨 THREAT DETECTED: ${threatLevel}`);
+
+        // SERVER-LEVEL ALERT DEBOUNCING
+        if (pythonResult.alert_sent || pythonResult.alert_queued) {
+          // Python tried to send alert, check if we should actually send it
+          if (shouldSendAlert(threatLevel)) {
+            stats.alerts++;
+            console.log(`📱 Alert allowed - sent to Telegram`);
+          } else {
+            console.log(`📱 Alert blocked by server-level debouncing`);
+          }
+        }
+      }
+    }
+
+    // Show efficiency stats every 10 frames
+    if ((stats.captured % 10) === 0) {
+      printStats();
+    }
+  } else {
+    const reason = pythonResult?.error || "no result";
+    console.log(`❌ Processing failed (${reason}, time: ${processTime}ms)`);
+  }
+
+  // Process next in queue
+  processQueue();
+}
+
+/**
+ * Fail the frame currently being processed (worker crashed or failed to start)
+ */
+function failPendingFrame(reason) {
+  if (!pendingFrame) return;
+  finishPendingFrame({ success: false, error: reason });
 }
 
 /**
@@ -322,6 +382,9 @@ process.on("SIGINT", () => {
   for (const [streamPath] of activeStreams) {
     stopFrameCapture(streamPath);
   }
+  if (pythonWorker) {
+    pythonWorker.stdin.end();
+  }
   console.log("👋 Goodbye!");
   process.exit(0);
 });
\ No newline at end of file
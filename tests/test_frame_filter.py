@@ -0,0 +1,58 @@
+"""
+Tests for the motion and deduplication filter of process_frame
+Run with: python -m unittest discover tests
+"""
+import unittest
+
+import numpy as np
+
+from process_frame import ProcessingState, _filter_frame, _start_frame, state
+
+def make_frame(invert=False, square=None):
+    """640x480 BGR frame with a horizontal gradient and an optional brighter 60x60 square at (x, y)"""
+    gradient = np.linspace(0, 255, 640)
+    if invert:
+        gradient = 255 - gradient
+    gray = np.tile(gradient, (480, 1))
+    if square is not None:
+        x, y = square
+        gray[y:y + 60, x:x + 60] += 30
+    gray = np.clip(gray, 0, 255).astype(np.uint8)
+    return np.dstack([gray, gray, gray])
+
+def filter_frame(frame):
+    result = _start_frame('frame.jpg')
+    return _filter_frame(frame, result), result
+
+class FrameFilterTest(unittest.TestCase):
+    def setUp(self):
+        ProcessingState.reset()
+    
+    def test_second_frame_can_be_duplicate(self):
+        # The first frame's full-motion result is not a scene change
+        needs_classification, _ = filter_frame(make_frame(square=(100, 100)))
+        self.assertTrue(needs_classification)
+        self.assertIsNotNone(state.frame_deduplicator.prev_hash)
+        
+        # A small object moving leaves the frame a duplicate of the first
+        needs_classification, result = filter_frame(make_frame(square=(300, 100)))
+        self.assertFalse(needs_classification)
+        self.assertEqual(result['skip_reason'], 'duplicate')
+    
+    def test_scene_change_keeps_hash(self):
+        filter_frame(make_frame())
+        filter_frame(make_frame())
+        
+        # A new scene skips the comparison but still records its hash
+        needs_classification, result = filter_frame(make_frame(invert=True))
+        self.assertTrue(needs_classification)
+        self.assertNotIn('similarity', result)
+        self.assertIsNotNone(state.frame_deduplicator.prev_hash)
+        
+        # The next frame is compared against the scene-change frame
+        needs_classification, result = filter_frame(make_frame(invert=True, square=(100, 100)))
+        self.assertFalse(needs_classification)
+        self.assertEqual(result['skip_reason'], 'duplicate')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+"""
+Tests for MotionDetector
+Run with: python -m unittest discover tests
+"""
+import unittest
+
+import numpy as np
+
+from python_modules.motion_detector import MotionDetector
+
+def make_frame(rect=None, value=220):
+    """Flat 640x480 grayscale frame, optionally with a bright rectangle (x, y, w, h)"""
+    frame = np.full((480, 640), 100, dtype=np.uint8)
+    if rect is not None:
+        x, y, w, h = rect
+        frame[y:y + h, x:x + w] = value
+    return frame
+
+class MotionDetectorTest(unittest.TestCase):
+    def setUp(self):
+        self.detector = MotionDetector(threshold=25, min_change_percent=0.5)
+    
+    def test_first_frame_is_processed(self):
+        has_motion, motion_percent = self.detector.detect_motion_gray(make_frame())
+        self.assertTrue(has_motion)
+        self.assertEqual(motion_percent, 100.0)
+    
+    def test_static_scene_has_no_motion(self):
+        for _ in range(3):
+            self.detector.detect_motion_gray(make_frame())
+        has_motion, motion_percent = self.detector.detect_motion_gray(make_frame())
+        self.assertFalse(has_motion)
+        self.assertEqual(motion_percent, 0)
+    
+    def test_object_that_appears_then_stays_still(self):
+        # Empty scene long enough for the detector to have a full history
+        for _ in range(3):
+            self.detector.detect_motion_gray(make_frame())
+        
+        # Object appears between two captures: no earlier change to intersect with
+        scene = make_frame(rect=(200, 150, 100, 100))
+        has_motion, motion_percent = self.detector.detect_motion_gray(scene)
+        self.assertTrue(has_motion)
+        self.assertGreaterEqual(motion_percent, self.detector.single_diff_percent)
+        
+        # Object stays still afterwards: no further motion
+        for _ in range(2):
+            has_motion, _ = self.detector.detect_motion_gray(scene.copy())
+            self.assertFalse(has_motion)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Tests for PatternScanner against the reference re.search(..., re.IGNORECASE)
+Run with: python -m unittest discover tests
+"""
+import random
+import re
+import unittest
+from unittest import mock
+
+from python_modules import _pattern_scan
+from python_modules._pattern_scan import PatternScanner
+from python_modules.threat_detector import ThreatDetector
+
+WORDS = [
+    'a', 'person', 'man', 'woman', 'holding', 'gun', 'guns', 'knife', 'scissor',
+    'scissors', 'breaking', 'into', 'in', 'through', 'forced', 'entry', 'break-in',
+    'suspicious', 'unknown', 'individual', 'hood', 'face', 'covered', 'climbing',
+    'jumping', 'fence', 'wall', 'abandoned', 'bag', 'package', 'unattended', 'item',
+    'at', 'night', 'after', 'hours', 'dark', 'darkness', 'unusual', 'activity',
+    'strange', 'behavior', 'employee', 'security', 'guard', 'badge', 'delivery',
+    'the', 'of', 'and', 'with', 'near', 'door', 'Gun', 'KNIFE', 'Fire', 'smoke_',
+    '_gun', 'gun2', '3knife', 'fire.', 'mask,', '(intruder)', "burglar's", '-', '...'
+]
+
+def reference_matches(patterns, text):
+    """First match of each pattern the way ThreatDetector used to search it"""
+    matches = []
+    for pattern in patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        matches.append(match.group(0) if match else None)
+    return matches
+
+class PatternScannerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        detector = ThreatDetector()
+        cls.patterns = [p for patterns in detector.threat_patterns.values() for p in patterns]
+        
+        # The regex fallback always, Hyperscan too when it is installed
+        cls.backends = [None]
+        if _pattern_scan.hyperscan is not None:
+            cls.backends.append(_pattern_scan.hyperscan)
+    
+    def scanner_matches(self, scanner, text):
+        result = scanner.scan(text)
+        return [result.match(pattern_id) for pattern_id in range(len(self.patterns))]
+    
+    def assert_matches_reference(self, captions):
+        for backend in self.backends:
+            with mock.patch.object(_pattern_scan, 'hyperscan', backend):
+                scanner = PatternScanner(self.patterns)
+                for caption in captions:
+                    text = caption.lower()
+                    with self.subTest(backend=backend, caption=caption):
+                        self.assertEqual(self.scanner_matches(scanner, text),
+                                         reference_matches(self.patterns, text))
+    
+    def test_known_captions(self):
+        self.assert_matches_reference([
+            '',
+            'An empty parking lot',
+            'A man holding a GUN near the door',
+            'Someone breaking  into the house at night',
+            'A break-in through the back window',
+            'Forced   entry, climbing the fence after hours',
+            'A security guard with a badge and a delivery package',
+            'scissors are not a scissor_ or 2gun',
+            'Unattended item: an abandoned bag in the dark',
+        ])
+    
+    def test_random_captions(self):
+        rng = random.Random(1234)
+        captions = []
+        for _ in range(2000):
+            words = rng.choices(WORDS, k=rng.randint(1, 12))
+            separators = rng.choices([' ', '  ', ', ', '-', '_', ''], k=len(words))
+            captions.append(''.join(w + s for w, s in zip(words, separators)))
+        self.assert_matches_reference(captions)
+    
+    def test_keyword_next_to_non_ascii_letter(self):
+        # Bytes-mode \w is ASCII-only: a keyword directly followed by a non-ASCII
+        # letter is a whole word to the scanner but not to the Unicode reference
+        text = 'a gunš on the table'
+        gun_pattern = next(i for i, p in enumerate(self.patterns) if 'gun' in p)
+        
+        for backend in self.backends:
+            with mock.patch.object(_pattern_scan, 'hyperscan', backend):
+                scanner = PatternScanner(self.patterns)
+                with self.subTest(backend=backend):
+                    self.assertEqual(scanner.scan(text).match(gun_pattern), 'gun')
+                    self.assertIsNone(re.search(self.patterns[gun_pattern], text, re.IGNORECASE))
+        
+        # Non-ASCII letters separated from the keyword do not change the result
+        self.assert_matches_reference(['café: a gun on the table', 'naïve intruder'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+Tests for the TelegramNotifier alert cooldown
+Run with: python -m unittest discover tests
+"""
+import itertools
+import unittest
+from concurrent.futures import Future
+from unittest import mock
+
+from python_modules.telegram_notifier import TelegramNotifier
+
+ANALYSIS = {
+    'timestamp': '2024-01-01T12:00:00',
+    'classification': 'A person holding a gun near the door',
+    'threat_level': 'CRITICAL',
+    'threat_reasons': [(5, 'gun')]
+}
+
+class DeferredExecutor:
+    """Executor stand-in that runs a submitted send only when told to"""
+    def __init__(self):
+        self.pending = []
+    
+    def submit(self, fn, *args):
+        future = Future()
+        self.pending.append((future, fn, args))
+        return future
+    
+    def run(self, index):
+        future, fn, args = self.pending[index]
+        future.set_result(fn(*args))
+
+class AlertCooldownTest(unittest.TestCase):
+    def setUp(self):
+        TelegramNotifier.reset_cooldown()
+        self.addCleanup(TelegramNotifier.reset_cooldown)
+        self.addCleanup(TelegramNotifier.set_cooldown, TelegramNotifier._alert_cooldown_seconds)
+        TelegramNotifier.set_cooldown(60)
+        
+        self.executor = DeferredExecutor()
+        self.send = mock.Mock(return_value=True)
+        for patcher in (
+            mock.patch.object(TelegramNotifier, '_executor', self.executor),
+            mock.patch.object(TelegramNotifier, '_send_photo_or_text', self.send),
+            # Distinct, increasing alert times
+            mock.patch('python_modules.telegram_notifier.time.monotonic',
+                       side_effect=itertools.count(1000.0))
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        
+        self.notifier = TelegramNotifier()
+        self.notifier.enabled = True
+        self.alert_key = self.notifier._alert_key(ANALYSIS)
+    
+    def test_repeat_alert_within_cooldown_is_debounced(self):
+        future = self.notifier.send_alert(ANALYSIS)
+        self.assertIsNotNone(future)
+        self.executor.run(0)
+        self.assertTrue(future.result())
+        
+        self.assertIsNone(self.notifier.send_alert(ANALYSIS))
+        self.assertEqual(len(self.executor.pending), 1)
+    
+    def test_failed_send_frees_cooldown(self):
+        self.send.return_value = False
+        future = self.notifier.send_alert(ANALYSIS)
+        
+        # Reserved on dispatch, while the send is in flight
+        self.assertIn(self.alert_key, TelegramNotifier._last_alert_time)
+        self.assertIsNone(self.notifier.send_alert(ANALYSIS))
+        
+        self.executor.run(0)
+        self.assertFalse(future.result())
+        self.assertNotIn(self.alert_key, TelegramNotifier._last_alert_time)
+        self.assertIsNotNone(self.notifier.send_alert(ANALYSIS))
+    
+    def test_older_failure_keeps_newer_reservation(self):
+        self.send.return_value = False
+        self.notifier.send_alert(ANALYSIS)
+        
+        # The cooldown expires and the same alert is dispatched again
+        TelegramNotifier.set_cooldown(0)
+        self.assertIsNotNone(self.notifier.send_alert(ANALYSIS))
+        newer = TelegramNotifier._last_alert_time[self.alert_key]
+        
+        # The first send fails after the second one was reserved
+        self.executor.run(0)
+        self.assertEqual(TelegramNotifier._last_alert_time.get(self.alert_key), newer)
+        
+        # The second send's own failure frees it
+        self.executor.run(1)
+        self.assertNotIn(self.alert_key, TelegramNotifier._last_alert_time)
+
+if __name__ == '__main__':
+    unittest.main()